@@ -1,37 +1,57 @@
 # agent.py
 
-from dotenv import load_dotenv
-load_dotenv()
-
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.agents import initialize_agent, AgentType
 from langchain.tools import tool
+from langchain_core.caches import InMemoryCache
+from langchain_core.globals import set_llm_cache
+from langchain_core.messages import BaseMessage
 import google.generativeai as genai
-import os
 
+from config import get_settings
 from tools.news_tool import get_company_news
 from tools.market_tool import compare_competitors
-from memory import get_memory  # ✅ this gets Supabase-based memory
 
 # 🔐 Configure Gemini
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+settings = get_settings()
+genai.configure(api_key=settings.google_api_key)
+# 🗃️ Process-wide LLM response cache (identical prompts skip the Gemini call)
+set_llm_cache(InMemoryCache(maxsize=1024))
 # 🤖 LLM Setup
 llm = ChatGoogleGenerativeAI(
     model="models/gemini-1.5-flash-latest",
     temperature=0.3,
+    google_api_key=settings.google_api_key,
+    max_retries=2,  # one retry on transient API errors instead of the default 6
 )
-# 🧠 Long-Term Memory from Supabase
-memory = get_memory()
-
 # 🧰 Tools
 tools = [get_company_news, compare_competitors]
 
-# 🤖 Agent with memory
+# 📝 Short system prefix (replaces LangChain's generic ~200-token default)
+AGENT_PREFIX = """Assistant is a competitive-intelligence advisor. It analyzes competitors, markets and company news, and uses the previous conversation history to answer questions about earlier turns.
+
+TOOLS:
+------
+
+Assistant has access to the following tools:"""
+
+# 🤖 Agent (built once; chat_history is passed in per call by the caller)
 agent_executor = initialize_agent(
     tools=tools,
     llm=llm,
     agent=AgentType.CONVERSATIONAL_REACT_DESCRIPTION,
-    memory=memory,
-    verbose=True,
+    agent_kwargs={"prefix": AGENT_PREFIX},
+    verbose=False,
     handle_parsing_errors=True,
-)
\ No newline at end of file
+    max_iterations=5,  # cap LLM calls when the agent keeps failing to parse/act
+)
+
+# 📝 Speaker labels the conversational agent prompt expects in {chat_history}
+HISTORY_PREFIXES = {"human": "Human", "ai": "AI"}
+
+def format_chat_history(messages: list[BaseMessage]) -> str:
+    """Render messages as the "Human: ..."/"AI: ..." lines the agent prompt expects."""
+    return "\n".join(
+        f"{HISTORY_PREFIXES.get(msg.type, msg.type)}: {msg.content}"
+        for msg in messages
+    )
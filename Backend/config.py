@@ -1,10 +1,32 @@
 # config.py
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
 from dotenv import load_dotenv
+import logging
 import os
 
-load_dotenv()  # Load from .env
+@dataclass(frozen=True)
+class Settings:
+    supabase_url: Optional[str]
+    supabase_key: Optional[str]
+    google_api_key: Optional[str]
+    serper_api_key: Optional[str]
+    log_level: str
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-SERPER_API_KEY = os.getenv("SERPER_API_KEY")
+def _log_level(name: str) -> str:
+    """Normalize LOG_LEVEL, falling back to WARNING for unknown names."""
+    name = name.strip().upper()
+    return name if isinstance(getattr(logging, name, None), int) else "WARNING"
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """Read the environment (and .env) once per process."""
+    load_dotenv()  # Load from .env
+    return Settings(
+        supabase_url=os.getenv("SUPABASE_URL"),
+        supabase_key=os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        serper_api_key=os.getenv("SERPER_API_KEY"),
+        log_level=_log_level(os.getenv("LOG_LEVEL", "WARNING")),
+    )
\ No newline at end of file
@@ -1,13 +1,23 @@
 # main.py
-from fastapi import FastAPI
+from fastapi import BackgroundTasks, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from langchain_core.messages import HumanMessage, AIMessage
+from typing import Optional
+import logging
+import orjson
+import re
 import uvicorn
 
-from agent import agent_executor
+from agent import agent_executor, format_chat_history
+from config import get_settings
 from memory import get_memory
 
+# 📋 WARNING by default; set LOG_LEVEL=DEBUG to trace requests and memory I/O
+logging.basicConfig(level=get_settings().log_level)
+logger = logging.getLogger(__name__)
+
 # 🧠 Shared memory
 memory = get_memory()
 
@@ -21,6 +31,34 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# ⚡ Queries answered straight from memory, without calling the agent
+LAST_QUESTION_RE = re.compile(
+    r"\s*(?:what(?:'s|\s+was|\s+is)\s+my\s+(?:last|previous)\s+question"
+    r"|what\s+did\s+i\s+(?:just\s+)?ask(?:\s+you)?)\s*[?!.]*\s*",
+    re.IGNORECASE,
+)
+
+def answer_from_memory(query: str) -> Optional[str]:
+    """Answer "what was my last question" style queries from memory, else None."""
+    if not LAST_QUESTION_RE.fullmatch(query):
+        return None
+    last_question = memory.chat_memory.last_human_message
+    if last_question:
+        return f'Your last question was: "{last_question}"'
+    return "You haven't asked me anything yet."
+
+def remember_turn(background_tasks: BackgroundTasks, query: str, output: str) -> None:
+    # In-process history is updated now, so the next request already sees this turn
+    memory.chat_memory.append_local_messages([
+        HumanMessage(content=query),
+        AIMessage(content=output),
+    ])
+    # The Supabase write runs in the threadpool after the response is sent
+    background_tasks.add_task(memory.chat_memory.persist)
+
+def sse_event(payload: dict) -> str:
+    return f"data: {orjson.dumps(payload).decode()}\n\n"
+
 # 📦 Request schema
 class ChatRequest(BaseModel):
     query: str
@@ -30,41 +68,72 @@ def read_root():
     return {"message": "🔍 Competitive Intelligence Chatbot is ready!"}
 # 💬 Chat endpoint
 @app.post("/chat")
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, background_tasks: BackgroundTasks):
     query = request.query
-    print(f"🧠 You: {query}")
+    logger.debug("🧠 You: %s", query)
     try:
+        output = answer_from_memory(query)
+        if output is not None:
+            remember_turn(background_tasks, query, output)
+            return {"response": output}
+
         result = await agent_executor.ainvoke({
             "input": query,
-            "chat_history": memory.chat_memory.get_messages()
+            "chat_history": format_chat_history(memory.buffer_as_messages)
         })
 
-        memory.chat_memory.add_message(HumanMessage(content=query))
-        memory.chat_memory.add_message(AIMessage(content=result["output"]))
+        remember_turn(background_tasks, query, result["output"])
 
-        print(f"🤖 Advisor: {result['output']}")
+        logger.debug("🤖 Advisor: %s", result["output"])
         return {"response": result["output"]}
     except Exception as e:
-        print(f"❌ Error: {e}")
+        logger.exception("❌ Chat request failed")
         return {"error": str(e)}
 
+# 📡 Streaming chat endpoint (Server-Sent Events)
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, background_tasks: BackgroundTasks):
+    query = request.query
+    logger.debug("🧠 You: %s", query)
+
+    async def event_stream():
+        try:
+            output = answer_from_memory(query)
+            if output is None:
+                async for chunk in agent_executor.astream({
+                    "input": query,
+                    "chat_history": format_chat_history(memory.buffer_as_messages)
+                }):
+                    # Tool calls are reported as they start, before the final answer
+                    for action in chunk.get("actions", []):
+                        # handle_parsing_errors surfaces parse failures as "_Exception" actions
+                        if action.tool != "_Exception":
+                            yield sse_event({"tool": action.tool})
+                    if "output" in chunk:
+                        output = chunk["output"]
+            # Record the turn before the last yield; a client that disconnects
+            # after receiving the answer closes the generator at that point
+            remember_turn(background_tasks, query, output)
+            logger.debug("🤖 Advisor: %s", output)
+            yield sse_event({"response": output})
+        except Exception as e:
+            logger.exception("❌ Streaming chat request failed")
+            yield sse_event({"error": str(e)})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 # 📂 Get memory endpoint
 @app.get("/memory")
-def get_memory_messages():
-    print("📤 Fetching messages...")
+async def get_memory_messages():
+    logger.debug("📤 Fetching messages...")
     try:
+        # Served from the in-process history; no Supabase read
         messages = memory.chat_memory.get_messages()
-        # Filter out duplicate messages
-        unique_messages = []
-        seen_contents = set()
-        for msg in messages:
-            # If the message content is not in seen_contents, add it to unique_messages
-            if msg.content not in seen_contents:
-                seen_contents.add(msg.content)
-                unique_messages.append(msg.content)
+        # Filter out duplicate messages (dict keys keep first-seen order)
+        unique_messages = list(dict.fromkeys(msg.content for msg in messages))
         return {"messages": unique_messages}
     except Exception as e:
-        print(f"❌ Error in memory retrieval: {str(e)}")
+        logger.exception("❌ Error in memory retrieval")
         return {"error": str(e)}
 
 @app.post("/clear-memory")
@@ -1,62 +1,131 @@
 # memory.py
 
-import json
-from langchain.memory import ConversationBufferMemory
+import logging
+import orjson
+import threading
+from functools import lru_cache
+from typing import Optional, Sequence
+from langchain.memory import ConversationBufferWindowMemory
 from langchain_core.chat_history import BaseChatMessageHistory
 from langchain_core.messages import BaseMessage, messages_from_dict, messages_to_dict
-from supabase import create_client
-from config import SUPABASE_URL, SUPABASE_KEY
+from supabase import Client, create_client
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 🪟 Number of recent exchanges sent to the agent as chat_history
+HISTORY_WINDOW = 10
 
 class SupabaseChatMessageHistory(BaseChatMessageHistory):
     def __init__(self, table_name: str, client):
         self.table_name = table_name
         self.session_id = "temp_session"
         self.client = client
+        # Loaded once here; every later read and write goes through this list
+        self.local_messages: list[BaseMessage] = []
+        self.version = 0  # bumped on every change to local_messages
+        self._last_human: Optional[str] = None
+        # Held only for in-memory updates, never across network I/O
+        self._local_lock = threading.Lock()
+        # Serializes Supabase writes so an older snapshot can't land after a newer one
+        self._write_lock = threading.Lock()
+        self._set_local_messages(self._fetch_messages())
+        self._persisted_version = self.version
 
     @property
     def messages(self) -> list[BaseMessage]:
         return self.get_messages()
 
-    def get_messages(self) -> list[BaseMessage]:
-        print(f"📤 Fetching messages from Supabase...")
+    @property
+    def last_human_message(self) -> Optional[str]:
+        """Content of the most recent human message in local_messages."""
+        return self._last_human
+
+    def _fetch_messages(self) -> list[BaseMessage]:
+        logger.debug("📤 Fetching messages from Supabase...")
         response = self.client.table(self.table_name).select("messages").eq("session_id", self.session_id).execute()
         if response.data and len(response.data) > 0:
             messages_json = response.data[0]["messages"]
-            print("🧠 Loaded messages:", messages_json)
-            return messages_from_dict(json.loads(messages_json))
-        print("⚠️ No previous messages found")
+            logger.debug("🧠 Loaded messages: %s", messages_json)
+            return messages_from_dict(orjson.loads(messages_json))
+        logger.debug("⚠️ No previous messages found")
         return []
 
+    def _set_local_messages(self, messages: list[BaseMessage]) -> None:
+        # Always rebind, never mutate, so snapshots taken by persist() stay stable
+        self.local_messages = messages
+        self._last_human = get_last_user_question(messages)
+        self.version += 1
+
+    def get_messages(self) -> list[BaseMessage]:
+        return list(self.local_messages)
+
+    def append_local_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append to the in-process history only; call persist() to write it to Supabase."""
+        logger.debug("📥 Adding %d messages", len(messages))
+        with self._local_lock:
+            self._set_local_messages(self.local_messages + list(messages))
+
+    def persist(self) -> None:
+        """Upsert the current local_messages. Failures are logged and retried by the next call."""
+        with self._write_lock:
+            with self._local_lock:
+                snapshot, version = self.local_messages, self.version
+            if version == self._persisted_version:
+                return  # an earlier call already wrote this state
+
+            # One serialization and one upsert for the whole history
+            messages_json = orjson.dumps(messages_to_dict(snapshot)).decode()
+            logger.debug("📝 Storing %d messages", len(snapshot))
+            try:
+                # Single round-trip insert-or-update keyed on the unique session_id
+                self.client.table(self.table_name).upsert(
+                    {"session_id": self.session_id, "messages": messages_json},
+                    on_conflict="session_id",
+                ).execute()
+            except Exception:
+                logger.exception("❌ Failed to persist chat history to Supabase")
+                return
+            self._persisted_version = version
+            logger.debug("✅ Messages added to Supabase")
+
     def add_message(self, message: BaseMessage) -> None:
-        print("📥 add_message called with:", message)
-        messages = self.get_messages()
-        messages.append(message)
-        messages_dict = messages_to_dict(messages)
-        messages_json = json.dumps(messages_dict)
-
-        print("📝 Storing messages:", messages_json)
-
-        existing = self.client.table(self.table_name).select("id").eq("session_id", self.session_id).execute()
-        if existing.data:
-            print("🔄 Updating existing row")
-            self.client.table(self.table_name).update({"messages": messages_json}).eq("session_id", self.session_id).execute()
-        else:
-            print("➕ Inserting new row")
-            self.client.table(self.table_name).insert({"session_id": self.session_id, "messages": messages_json}).execute()
-        print("✅ Message added to Supabase")
+        self.add_messages([message])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        # Local history first, so reads never lag behind the conversation
+        self.append_local_messages(messages)
+        self.persist()
 
     def clear(self) -> None:
-        self.client.table(self.table_name).delete().eq("session_id", self.session_id).execute()
-        print("🧹 Memory cleared in Supabase")
+        with self._write_lock:
+            with self._local_lock:
+                self._set_local_messages([])
+                version = self.version
+            self.client.table(self.table_name).delete().eq("session_id", self.session_id).execute()
+            self._persisted_version = version
+        logger.debug("🧹 Memory cleared in Supabase")
+
+def get_last_user_question(messages: list[BaseMessage]) -> Optional[str]:
+    for msg in reversed(messages):
+        if msg.type == "human":
+            return msg.content
+    return None
+
+@lru_cache(maxsize=None)
+def get_supabase_client() -> Client:
+    """One Supabase client per process, so its HTTP connection pool is reused."""
+    settings = get_settings()
+    return create_client(settings.supabase_url, settings.supabase_key)
 
 def get_memory():
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     message_history = SupabaseChatMessageHistory(
         table_name="chat_memory",
-        client=supabase
+        client=get_supabase_client()
     )
 
-    memory = ConversationBufferMemory(
+    memory = ConversationBufferWindowMemory(
+        k=HISTORY_WINDOW,
         memory_key="chat_history",
         return_messages=True,
         chat_memory=message_history
@@ -1,11 +1,12 @@
 from langchain.tools import tool
 import requests
-import os
+
+from config import get_settings
 
 @tool("get_company_news")
 def get_company_news(company: str) -> str:
     """Fetches recent news articles about a given company using the Serper API."""
-    api_key = os.getenv("SERPER_API_KEY")
+    api_key = get_settings().serper_api_key
     headers = {
         "X-API-KEY": api_key,
         "Content-Type": "application/json"